@@ -12,13 +12,199 @@ Tests:
 
 import subprocess
 import time
+import ctypes
+import io
 import os
+import mmap
 import re
+import select
 import signal
 import shutil
+import socket
+import struct
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Tuple
-from dataclasses import dataclass
+from typing import Dict, Optional
+from dataclasses import dataclass, field
+
+# inotify through libc for event-driven file waits; None off Linux, in
+# which case waits fall back to stat polling
+try:
+    _libc = ctypes.CDLL(None, use_errno=True)
+    _inotify_init1 = _libc.inotify_init1
+    _inotify_add_watch = _libc.inotify_add_watch
+except (OSError, AttributeError, TypeError):
+    _inotify_init1 = _inotify_add_watch = None
+else:
+    _inotify_init1.argtypes = [ctypes.c_int]
+    _inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_INOTIFY_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+# Patterns matched against raw process output
+_NODE_ID_RE = re.compile(rb'Node ID: ([a-f0-9]+)')
+_CONNECTED_RE = re.compile('Connected to peer|✅ Connected'.encode())
+_PEER_CONNECTED_RE = re.compile(rb'Peer connected: ([a-f0-9]+)')
+
+
+# Keep test state on tmpfs when available so persistence I/O and cleanup
+# never touch the disk; each tester creates its own private root under here
+if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+    _TEST_ROOT = Path('/dev/shm')
+else:
+    _TEST_ROOT = Path('.')
+
+
+def _inotify_names(data: bytes):
+    """Yield the file names from a buffer of raw inotify events."""
+    offset = 0
+    while offset < len(data):
+        _, _, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+        offset += _INOTIFY_EVENT.size
+        yield data[offset:offset + length].rstrip(b'\0')
+        offset += length
+
+
+def _port_open(host: str, port: int) -> bool:
+    """Check whether something is accepting TCP connections on host:port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(0.2)
+        return sock.connect_ex((host, port)) == 0
+
+
+class _OutputReader(threading.Thread):
+    """Follow a tunnel process's output for as long as it runs.
+    
+    Output either goes to a memfd, which the process can write to without
+    ever blocking and which is searched in place through mmap as it grows,
+    or to a pipe that is drained continuously so it never fills. Signals
+    when the Node ID and the peer connection show up. Both events are also
+    set once the output ends so waiters wake up; check node_id / connected
+    for the outcome.
+    
+    In memfd mode the reader takes ownership of memfd and of pidfd, which it
+    uses to notice the exit without reaping the process.
+    """
+    
+    def __init__(self, process: subprocess.Popen, memfd: Optional[int] = None,
+                 pidfd: Optional[int] = None):
+        super().__init__(daemon=True)
+        self.process = process
+        self.memfd = memfd
+        self.pidfd = pidfd
+        self.node_id: Optional[str] = None
+        self.connected = False
+        self.node_id_evt = threading.Event()
+        self.connected_evt = threading.Event()
+        
+        # Node IDs of peers a server reported accepting
+        self.peers = set()
+        self._peers_cond = threading.Condition()
+        self._done = False
+    
+    def wait_for_peer(self, node_id: str, timeout: float) -> bool:
+        """Wait until the process reports it accepted a connection from node_id."""
+        with self._peers_cond:
+            self._peers_cond.wait_for(lambda: node_id in self.peers or self._done, timeout)
+            return node_id in self.peers
+    
+    def run(self):
+        if self.memfd is None:
+            self._drain_pipe()
+        else:
+            try:
+                self._follow_memfd()
+            finally:
+                os.close(self.memfd)
+                if self.pidfd is not None:
+                    os.close(self.pidfd)
+        
+        self.node_id_evt.set()
+        self.connected_evt.set()
+        with self._peers_cond:
+            self._done = True
+            self._peers_cond.notify_all()
+    
+    def _drain_pipe(self):
+        fd = self.process.stdout.fileno()
+        output = bytearray()
+        while True:
+            try:
+                chunk = os.read(fd, 4096)
+            except OSError:
+                break
+            if not chunk:
+                break
+            
+            # Only scan complete lines so a Node ID split across reads is not
+            # matched truncated, then drop them; only a partial line is kept
+            output += chunk
+            end = output.rfind(b'\n') + 1
+            if end:
+                self._scan(output, 0, end)
+                del output[:end]
+        
+        self._scan(output, 0, len(output))
+    
+    def _follow_memfd(self, interval: float = 0.01):
+        scanned = 0
+        while True:
+            # Check for exit before sizing so the final writes are not missed
+            exited = self._exited()
+            size = os.fstat(self.memfd).st_size
+            if size > scanned:
+                # Remap as the file grows and search the mapping in place
+                with mmap.mmap(self.memfd, size, access=mmap.ACCESS_READ) as view:
+                    end = size if exited else view.rfind(b'\n', scanned, size) + 1
+                    if end > scanned:
+                        self._scan(view, scanned, end)
+                        scanned = end
+            
+            if exited:
+                break
+            time.sleep(interval)
+    
+    def _exited(self) -> bool:
+        # Neither check reaps, which leaves the pid reserved until _terminate
+        # collects it on the owning thread: a pidfd turns readable on exit,
+        # and WNOWAIT leaves the zombie in place
+        if self.pidfd is not None:
+            return bool(select.select([self.pidfd], [], [], 0)[0])
+        try:
+            return os.waitid(os.P_PID, self.process.pid,
+                             os.WEXITED | os.WNOHANG | os.WNOWAIT) is not None
+        except ChildProcessError:
+            return True  # Already reaped by _terminate
+    
+    def _scan(self, data, start: int, end: int):
+        """Search data[start:end] for whichever markers are still missing."""
+        # Look for Node ID
+        if self.node_id is None:
+            match = _NODE_ID_RE.search(data, start, end)
+            if match:
+                self.node_id = match.group(1).decode('ascii')
+                self.node_id_evt.set()
+        
+        # Check for connection
+        if not self.connected and _CONNECTED_RE.search(data, start, end):
+            self.connected = True
+            self.connected_evt.set()
+        
+        # Record accepted peers
+        peers = {match.group(1).decode('ascii')
+                 for match in _PEER_CONNECTED_RE.finditer(data, start, end)}
+        if peers:
+            with self._peers_cond:
+                self.peers |= peers
+                self._peers_cond.notify_all()
 
 
 @dataclass
@@ -29,6 +215,13 @@ class ProcessInfo:
     port: int
     work_dir: Path
     mode: str  # "server" or "client"
+    reader: Optional[_OutputReader] = None
+    pidfd: Optional[int] = None  # Opened right after spawn, closed once reaped
+    _work_dir_str: str = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        # Cached for check_file_exists, which runs inside polling loops
+        self._work_dir_str = str(self.work_dir)
 
 
 class Colors:
@@ -41,18 +234,40 @@ class Colors:
     BOLD = '\033[1m'
 
 
+# Escape codes are just noise when output is redirected (e.g. CI logs)
+if not sys.stdout.isatty():
+    for _name in ('BLUE', 'GREEN', 'YELLOW', 'RED', 'NC', 'BOLD'):
+        setattr(Colors, _name, '')
+
+
 class TunnelTester:
     """Framework for testing tunnel persistence behavior."""
     
-    def __init__(self, binary_path: str = "./target/debug/tunnel"):
+    def __init__(self, binary_path: str = "./target/debug/tunnel", scenario: int = 0):
         # Resolve binary path relative to script directory
         script_dir = Path(__file__).parent
         if not Path(binary_path).is_absolute():
             binary_path = str(script_dir / binary_path)
         
+        self.script_dir = script_dir
         self.binary_path = binary_path
-        self.test_dirs = []
-        self.processes = []
+        self.test_root: Optional[Path] = None
+        self.processes: Dict[int, ProcessInfo] = {}
+        
+        # Scenarios run concurrently, so each one gets its own port range
+        # and directory prefix to avoid EADDRINUSE and shared state
+        self.scenario = scenario
+        self.server_port = 8080 + 10 * scenario
+        self.client_port = 9080 + 10 * scenario
+        
+        # Buffered output while a scenario runs alongside others, so its log
+        # lines stay together instead of interleaving on stdout
+        self._output: Optional[io.StringIO] = None
+        
+        # Held while a process may be signalled or reaped, so another thread
+        # (see interrupt) never signals a pid that has just been freed
+        self._reap_lock = threading.Lock()
+        self._interrupted = False
         
         # Verify binary exists
         if not Path(self.binary_path).exists():
@@ -61,204 +276,386 @@ class TunnelTester:
                 f"Please run 'cargo build' first."
             )
         
+    def log(self, *args, **kwargs):
+        """Print a line, or buffer it while running a concurrent scenario."""
+        print(*args, file=self._output, **kwargs)
+    
+    def take_output(self) -> str:
+        """Return and stop buffering the output captured by run_scenario."""
+        output = self._output.getvalue() if self._output is not None else ""
+        self._output = None
+        return output
+    
+    def interrupt(self):
+        """Ask this tester's processes to stop, from another thread.
+        
+        Only signals them; the thread running the scenario still reaps,
+        cleans up and owns the output. Processes spawned afterwards are
+        signalled as soon as they start.
+        """
+        with self._reap_lock:
+            self._interrupted = True
+            for proc_info in list(self.processes.values()):
+                if proc_info.process.returncode is None:
+                    self._signal(proc_info, signal.SIGTERM)
+    
     def cleanup(self):
         """Clean up all test processes and directories."""
-        print(f"{Colors.YELLOW}Cleaning up...{Colors.NC}")
+        self.log(f"{Colors.YELLOW}Cleaning up...{Colors.NC}")
         
         # Kill all processes
-        for proc_info in self.processes:
+        self._terminate(
+            *list(self.processes.values()),
+            timeout=2.0
+        )
+        
+        # Remove test directories; they all live under this tester's root
+        if self.test_root is not None:
+            shutil.rmtree(self.test_root, ignore_errors=True)
+        
+        self.processes = {}
+        self.test_root = None
+        self.log(f"{Colors.GREEN}Cleanup complete{Colors.NC}\n")
+    
+    def _terminate(self, *proc_infos: ProcessInfo, timeout: float = 0.5):
+        """Stop processes and everything in their process groups.
+        
+        Sends SIGTERM to every group up front so they shut down in parallel,
+        waits for them against a single shared deadline, and escalates to
+        SIGKILL for any still running once timeout expires.
+        """
+        with self._reap_lock:
+            self._terminate_locked(proc_infos, timeout)
+    
+    def _terminate_locked(self, proc_infos, timeout: float):
+        # Only this call reaps these processes, so anything still running
+        # here keeps its pid (and pgid) until we collect it below
+        remaining = [proc_info for proc_info in proc_infos if proc_info.process.poll() is None]
+        
+        for proc_info in remaining:
+            self._signal(proc_info, signal.SIGTERM)
+        
+        # Reap through Popen.poll rather than waitpid(-1), which would also
+        # collect processes owned by testers running on other threads
+        deadline = time.monotonic() + timeout
+        self._wait_pidfds(remaining, deadline)
+        remaining = [proc_info for proc_info in remaining if proc_info.process.poll() is None]
+        
+        # Fallback for processes without a pidfd
+        while remaining and time.monotonic() < deadline:
+            remaining = [proc_info for proc_info in remaining if proc_info.process.poll() is None]
+            if remaining:
+                time.sleep(0.01)
+        
+        for proc_info in remaining:
+            self._signal(proc_info, signal.SIGKILL)
+        for proc_info in remaining:
             try:
-                proc_info.process.terminate()
-                proc_info.process.wait(timeout=2)
-            except:
-                try:
-                    proc_info.process.kill()
-                except:
-                    pass
+                proc_info.process.wait(timeout=0.1)
+            except subprocess.TimeoutExpired:
+                pass
+        
+        for proc_info in proc_infos:
+            if proc_info.pidfd is not None and proc_info.process.returncode is not None:
+                os.close(proc_info.pidfd)
+                proc_info.pidfd = None
+    
+    def _signal(self, proc_info: ProcessInfo, sig: int):
+        """Send sig to a process and everything it spawned."""
+        # Processes are started in their own session, so pgid == pid. Only
+        # _terminate reaps, under _reap_lock, so the pid cannot be recycled
+        # while it is still tracked here
+        try:
+            os.killpg(proc_info.process.pid, sig)
+        except ProcessLookupError:
+            pass
+    
+    def _wait_pidfds(self, proc_infos, deadline: float):
+        """Block until processes exit or deadline passes, using pidfds.
+        
+        A pidfd becomes readable the moment its process exits, so this
+        returns on the actual exit rather than on a polling interval.
+        """
+        pidfds = {proc_info.pidfd: proc_info for proc_info in proc_infos
+                  if proc_info.pidfd is not None}
+        if not pidfds:
+            return
         
-        # Remove test directories
-        for test_dir in self.test_dirs:
-            if test_dir.exists():
-                shutil.rmtree(test_dir)
+        poller = select.poll()
+        for pidfd in pidfds:
+            poller.register(pidfd, select.POLLIN)
         
-        self.processes = []
-        self.test_dirs = []
-        print(f"{Colors.GREEN}Cleanup complete{Colors.NC}\n")
+        waiting = set(pidfds)
+        while waiting:
+            timeout_ms = max(0, int((deadline - time.monotonic()) * 1000))
+            events = poller.poll(timeout_ms)
+            if not events:
+                break
+            for pidfd, _ in events:
+                poller.unregister(pidfd)
+                waiting.discard(pidfd)
+                pidfds[pidfd].process.poll()
+    
+    def _needs_rebuild(self) -> bool:
+        """Check whether any crate source is newer than the binary."""
+        binary_mtime = os.stat(self.binary_path).st_mtime
+        
+        # Manifest, lockfile (dependency bumps) and build script, if present
+        for name in ("Cargo.toml", "Cargo.lock", "build.rs"):
+            path = self.script_dir / name
+            if path.exists() and os.stat(path).st_mtime > binary_mtime:
+                return True
+        
+        pending = [str(self.script_dir / "src")]
+        while pending:
+            try:
+                entries = os.scandir(pending.pop())
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.name.endswith(".rs") and entry.stat().st_mtime > binary_mtime:
+                        return True
+        return False
     
     def build_binary(self):
         """Build the binary before testing."""
-        print(f"{Colors.BLUE}Building the binary...{Colors.NC}")
+        self.log(f"{Colors.BLUE}Building the binary...{Colors.NC}")
         result = subprocess.run(["cargo", "build"], capture_output=True, text=True)
         if result.returncode != 0:
-            print(f"{Colors.RED}Build failed:{Colors.NC}\n{result.stderr}")
+            self.log(f"{Colors.RED}Build failed:{Colors.NC}\n{result.stderr}")
             return False
-        print(f"{Colors.GREEN}Build complete{Colors.NC}\n")
+        self.log(f"{Colors.GREEN}Build complete{Colors.NC}\n")
         return True
     
-    def start_server(self, name: str, port: int = 8080) -> Optional[ProcessInfo]:
-        """Start a server instance."""
-        work_dir = Path(f".test_{name.lower().replace(' ', '_')}")
-        work_dir.mkdir(exist_ok=True)
-        self.test_dirs.append(work_dir)
+    def _work_dir(self, name: str) -> Path:
+        """Create a fresh working directory for a named process.
+        
+        Every call gets a new directory, so state left behind by an earlier
+        or concurrent run can never leak into this one.
+        """
+        # mkdtemp creates the root 0700 and uniquely named, so testers of
+        # other users (or other runs) never share it
+        if self.test_root is None:
+            self.test_root = Path(tempfile.mkdtemp(prefix=".tunnel_tests_", dir=_TEST_ROOT))
+        
+        prefix = f".test_{self.scenario}_{name.lower().replace(' ', '_')}_"
+        work_dir = Path(tempfile.mkdtemp(prefix=prefix, dir=self.test_root))
+        return work_dir
+    
+    def _spawn(self, *args: str, work_dir: Path, port: int, mode: str) -> ProcessInfo:
+        """Launch the tunnel binary in work_dir and start following its output.
+        
+        The process is registered in self.processes straight away, so it is
+        covered by cleanup and interrupt while it is still starting up.
+        """
+        if self._interrupted:
+            raise RuntimeError("Tester was interrupted")
+        
+        # Send output to an anonymous in-memory file where available so the
+        # process never blocks on a full pipe; fall back to a drained pipe
+        memfd = os.memfd_create("tunnel_out", os.MFD_CLOEXEC) if hasattr(os, "memfd_create") else None
+        
+        # CPython only takes the posix_spawn fast path when cwd is None and
+        # start_new_session is off. The binary keeps .tunnel_key/.tunnel_peer
+        # relative to its working directory and os.posix_spawn has no chdir
+        # action, so this stays on fork/exec; keep preexec_fn out of here
+        # regardless, it forces the slow path even when the rest qualify.
+        try:
+            process = subprocess.Popen(
+                [self.binary_path, *args],
+                cwd=work_dir,
+                stdout=subprocess.PIPE if memfd is None else memfd,
+                stderr=subprocess.STDOUT,
+                start_new_session=True
+            )
+        except BaseException:
+            if memfd is not None:
+                os.close(memfd)
+            raise
+        
+        # Hold a pidfd from the start so exit waits never need to reap
+        pidfd = None
+        if hasattr(os, "pidfd_open"):
+            try:
+                pidfd = os.pidfd_open(process.pid)
+            except OSError:
+                pass
         
-        print(f"{Colors.BLUE}Starting {name} (port {port})...{Colors.NC}")
+        reader_pidfd = os.dup(pidfd) if memfd is not None and pidfd is not None else None
+        reader = _OutputReader(process, memfd=memfd, pidfd=reader_pidfd)
+        reader.start()
         
-        # Start process
-        process = subprocess.Popen(
-            [self.binary_path, "-p", str(port)],
-            cwd=work_dir,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1
+        proc_info = ProcessInfo(
+            process=process,
+            node_id=None,
+            port=port,
+            work_dir=work_dir,
+            mode=mode,
+            reader=reader,
+            pidfd=pidfd
         )
+        with self._reap_lock:
+            self.processes[process.pid] = proc_info
+            if self._interrupted:
+                self._signal(proc_info, signal.SIGTERM)
+        return proc_info
+    
+    def start_server(self, name: str, port: int,
+                     persist_dir: Optional[Path] = None) -> Optional[ProcessInfo]:
+        """Start a server instance.
+        
+        Pass persist_dir to restart a server in an existing directory and
+        pick up its persisted state.
+        """
+        work_dir = persist_dir if persist_dir is not None else self._work_dir(name)
+        
+        self.log(f"{Colors.BLUE}Starting {name} (port {port})...{Colors.NC}")
+        
+        # Start process
+        proc_info = self._spawn("-p", str(port), work_dir=work_dir, port=port, mode="server")
+        reader = proc_info.reader
         
         # Wait for startup and extract Node ID
-        node_id = None
-        start_time = time.time()
-        while time.time() - start_time < 5:
-            line = process.stdout.readline()
-            if not line:
-                break
-            
-            # Look for Node ID
-            match = re.search(r'Node ID: ([a-f0-9]+)', line)
-            if match:
-                node_id = match.group(1)
-                break
+        reader.node_id_evt.wait(timeout=5)
+        node_id = proc_info.node_id = reader.node_id
         
         if not node_id:
-            print(f"{Colors.RED}Failed to start {name} (no Node ID found){Colors.NC}")
-            process.terminate()
+            self.log(f"{Colors.RED}Failed to start {name} (no Node ID found){Colors.NC}")
+            self._terminate(proc_info)
+            self.processes.pop(proc_info.process.pid, None)
             return None
         
-        proc_info = ProcessInfo(
-            process=process,
-            node_id=node_id,
-            port=port,
-            work_dir=work_dir,
-            mode="server"
-        )
-        self.processes.append(proc_info)
-        
-        print(f"{Colors.GREEN}{name} started{Colors.NC}")
-        print(f"  Node ID: {node_id}")
-        print(f"  Port: {port}")
-        print(f"  Directory: {work_dir}\n")
+        self.log(f"{Colors.GREEN}{name} started{Colors.NC}")
+        self.log(f"  Node ID: {node_id}")
+        self.log(f"  Port: {port}")
+        self.log(f"  Directory: {work_dir}\n")
         
         return proc_info
     
-    def start_client(self, name: str, server_node_id: str, port: int = 9080) -> Optional[ProcessInfo]:
+    def start_client(self, name: str, server_node_id: str, port: int) -> Optional[ProcessInfo]:
         """Start a client instance."""
-        work_dir = Path(f".test_{name.lower().replace(' ', '_')}")
-        work_dir.mkdir(exist_ok=True)
-        self.test_dirs.append(work_dir)
+        work_dir = self._work_dir(name)
         
-        print(f"{Colors.BLUE}Starting {name} (connecting to {server_node_id[:16]}...)...{Colors.NC}")
+        self.log(f"{Colors.BLUE}Starting {name} (connecting to {server_node_id[:16]}...)...{Colors.NC}")
         
         # Start process
-        process = subprocess.Popen(
-            [self.binary_path, "-p", str(port), "-c", server_node_id],
-            cwd=work_dir,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1
-        )
+        proc_info = self._spawn("-p", str(port), "-c", server_node_id,
+                                work_dir=work_dir, port=port, mode="client")
+        reader = proc_info.reader
         
-        # Wait for startup and extract Node ID
-        node_id = None
-        connected = False
-        start_time = time.time()
-        
-        while time.time() - start_time < 10:
-            line = process.stdout.readline()
-            if not line:
-                break
-            
-            # Look for Node ID
-            match = re.search(r'Node ID: ([a-f0-9]+)', line)
-            if match:
-                node_id = match.group(1)
-            
-            # Check for connection
-            if "Connected to peer" in line or "✅ Connected" in line:
-                connected = True
-                break
+        # Wait for startup, extract Node ID and confirm connection
+        reader.connected_evt.wait(timeout=10)
+        node_id = proc_info.node_id = reader.node_id
+        connected = reader.connected
         
         if not node_id or not connected:
-            print(f"{Colors.RED}Failed to start {name}{Colors.NC}")
+            self.log(f"{Colors.RED}Failed to start {name}{Colors.NC}")
             if not node_id:
-                print(f"  Reason: No Node ID found")
+                self.log(f"  Reason: No Node ID found")
             if not connected:
-                print(f"  Reason: Did not connect to server")
-            process.terminate()
+                self.log(f"  Reason: Did not connect to server")
+            self._terminate(proc_info)
+            self.processes.pop(proc_info.process.pid, None)
             return None
         
-        proc_info = ProcessInfo(
-            process=process,
-            node_id=node_id,
-            port=port,
-            work_dir=work_dir,
-            mode="client"
-        )
-        self.processes.append(proc_info)
-        
-        print(f"{Colors.GREEN}{name} started and connected{Colors.NC}")
-        print(f"  Node ID: {node_id}")
-        print(f"  Port: {port}\n")
+        self.log(f"{Colors.GREEN}{name} started and connected{Colors.NC}")
+        self.log(f"  Node ID: {node_id}")
+        self.log(f"  Port: {port}\n")
         
         return proc_info
     
     def stop_process(self, proc_info: ProcessInfo):
         """Stop a specific process."""
-        print(f"{Colors.YELLOW}Stopping process (Node ID: {proc_info.node_id[:16]}...)...{Colors.NC}")
-        try:
-            proc_info.process.terminate()
-            proc_info.process.wait(timeout=2)
-        except:
-            proc_info.process.kill()
+        self.log(f"{Colors.YELLOW}Stopping process (Node ID: {proc_info.node_id[:16]}...)...{Colors.NC}")
+        self._terminate(proc_info)
         
-        if proc_info in self.processes:
-            self.processes.remove(proc_info)
-        print(f"{Colors.GREEN}Process stopped{Colors.NC}\n")
+        self.processes.pop(proc_info.process.pid, None)
+        self.log(f"{Colors.GREEN}Process stopped{Colors.NC}\n")
+    
+    def _wait_for(self, pred, timeout: float = 5.0, interval: float = 0.02) -> bool:
+        """Poll pred until it returns True or timeout expires."""
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            if pred():
+                return True
+            time.sleep(interval)
+        return False
     
     def check_file_exists(self, proc_info: ProcessInfo, filename: str) -> bool:
         """Check if a file exists in the process working directory."""
-        return (proc_info.work_dir / filename).exists()
+        return os.path.lexists(os.path.join(proc_info._work_dir_str, filename))
+    
+    def wait_for_file(self, proc_info: ProcessInfo, filename: str, timeout: float = 5.0) -> bool:
+        """Wait for a file to appear in the process working directory.
+        
+        Uses inotify where available, otherwise polls.
+        """
+        deadline = time.monotonic() + timeout
+        poll = lambda: self._wait_for(lambda: self.check_file_exists(proc_info, filename),
+                                      max(0.0, deadline - time.monotonic()))
+        
+        fd = _inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC) if _inotify_init1 else -1
+        if fd < 0:
+            return poll()
+        
+        try:
+            mask = _IN_CREATE | _IN_CLOSE_WRITE | _IN_MOVED_TO
+            if _inotify_add_watch(fd, os.fsencode(proc_info._work_dir_str), mask) < 0:
+                return poll()
+            
+            # The file may have been written before the watch was added
+            if self.check_file_exists(proc_info, filename):
+                return True
+            
+            wanted = os.fsencode(filename)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                    return False
+                try:
+                    data = os.read(fd, 4096)
+                except BlockingIOError:
+                    continue
+                if wanted in _inotify_names(data):
+                    return True
+        finally:
+            os.close(fd)
     
     def print_test_header(self, scenario_num: int, title: str):
         """Print a test scenario header."""
-        print(f"\n{Colors.BLUE}{'=' * 60}{Colors.NC}")
-        print(f"{Colors.BLUE}{Colors.BOLD}TEST SCENARIO {scenario_num}: {title}{Colors.NC}")
-        print(f"{Colors.BLUE}{'=' * 60}{Colors.NC}\n")
+        self.log(f"\n{Colors.BLUE}{'=' * 60}{Colors.NC}")
+        self.log(f"{Colors.BLUE}{Colors.BOLD}TEST SCENARIO {scenario_num}: {title}{Colors.NC}")
+        self.log(f"{Colors.BLUE}{'=' * 60}{Colors.NC}\n")
     
     def print_result(self, passed: bool, message: str):
         """Print a test result."""
         if passed:
-            print(f"{Colors.GREEN}✓ {message}{Colors.NC}")
+            self.log(f"{Colors.GREEN}✓ {message}{Colors.NC}")
         else:
-            print(f"{Colors.RED}✗ {message}{Colors.NC}")
+            self.log(f"{Colors.RED}✗ {message}{Colors.NC}")
         return passed
     
     def test_scenario_1_stable_server_id(self) -> bool:
         """Test that server has stable Node ID across restarts."""
         self.print_test_header(1, "Server Has Stable Node ID")
         
-        print(f"{Colors.YELLOW}Step 1: Starting server first time{Colors.NC}")
-        server = self.start_server("Server", port=8080)
+        self.log(f"{Colors.YELLOW}Step 1: Starting server first time{Colors.NC}")
+        server = self.start_server("Server", port=self.server_port)
         if not server:
             return self.print_result(False, "Failed to start server")
         
         first_node_id = server.node_id
-        time.sleep(1)
+        self._wait_for(lambda: _port_open('127.0.0.1', server.port))
         
-        print(f"{Colors.YELLOW}Step 2: Stopping server{Colors.NC}")
+        self.log(f"{Colors.YELLOW}Step 2: Stopping server{Colors.NC}")
         self.stop_process(server)
-        time.sleep(1)
+        self._wait_for(lambda: not _port_open('127.0.0.1', server.port))
         
-        print(f"{Colors.YELLOW}Step 3: Restarting server{Colors.NC}")
-        server2 = self.start_server("Server", port=8080)
+        self.log(f"{Colors.YELLOW}Step 3: Restarting server{Colors.NC}")
+        server2 = self.start_server("Server", port=self.server_port, persist_dir=server.work_dir)
         if not server2:
             return self.print_result(False, "Failed to restart server")
         
@@ -268,8 +665,8 @@ class TunnelTester:
         result = first_node_id == second_node_id
         self.print_result(result, f"Server has stable Node ID: {first_node_id == second_node_id}")
         if result:
-            print(f"  First run:  {first_node_id}")
-            print(f"  Second run: {second_node_id}")
+            self.log(f"  First run:  {first_node_id}")
+            self.log(f"  Second run: {second_node_id}")
         
         self.stop_process(server2)
         return result
@@ -278,27 +675,27 @@ class TunnelTester:
         """Test that client has random Node ID each run."""
         self.print_test_header(2, "Client Has Ephemeral Node ID")
         
-        print(f"{Colors.YELLOW}Step 1: Starting server{Colors.NC}")
-        server = self.start_server("Server", port=8081)
+        self.log(f"{Colors.YELLOW}Step 1: Starting server{Colors.NC}")
+        server = self.start_server("Server", port=self.server_port)
         if not server:
             return self.print_result(False, "Failed to start server")
         
-        time.sleep(1)
+        self._wait_for(lambda: _port_open('127.0.0.1', server.port))
         
-        print(f"{Colors.YELLOW}Step 2: Starting client first time{Colors.NC}")
-        client1 = self.start_client("Client1", server.node_id, port=9081)
+        self.log(f"{Colors.YELLOW}Step 2: Starting client first time{Colors.NC}")
+        client1 = self.start_client("Client1", server.node_id, port=self.client_port)
         if not client1:
             self.stop_process(server)
             return self.print_result(False, "Failed to start client")
         
         first_node_id = client1.node_id
-        time.sleep(1)
+        self._wait_for(lambda: _port_open('127.0.0.1', client1.port))
         
-        print(f"{Colors.YELLOW}Step 3: Stopping and restarting client{Colors.NC}")
+        self.log(f"{Colors.YELLOW}Step 3: Stopping and restarting client{Colors.NC}")
         self.stop_process(client1)
-        time.sleep(1)
+        self._wait_for(lambda: not _port_open('127.0.0.1', client1.port))
         
-        client2 = self.start_client("Client2", server.node_id, port=9082)
+        client2 = self.start_client("Client2", server.node_id, port=self.client_port + 1)
         if not client2:
             self.stop_process(server)
             return self.print_result(False, "Failed to restart client")
@@ -309,166 +706,205 @@ class TunnelTester:
         result = first_node_id != second_node_id
         self.print_result(result, f"Client has different Node ID each run: {first_node_id != second_node_id}")
         if result:
-            print(f"  First run:  {first_node_id}")
-            print(f"  Second run: {second_node_id}")
+            self.log(f"  First run:  {first_node_id}")
+            self.log(f"  Second run: {second_node_id}")
         
         self.stop_process(client2)
         self.stop_process(server)
         return result
     
-    def test_scenario_3_server_no_peer_persistence(self) -> bool:
+    def test_scenario_3_server_no_peer_persistence(self, server: Optional[ProcessInfo]) -> bool:
         """Test that server never creates .tunnel_peer file."""
         self.print_test_header(3, "Server Never Persists Peer Connections")
         
-        print(f"{Colors.YELLOW}Step 1: Starting server{Colors.NC}")
-        server = self.start_server("Server", port=8082)
         if not server:
             return self.print_result(False, "Failed to start server")
         
-        time.sleep(1)
-        
-        print(f"{Colors.YELLOW}Step 2: Connecting client to server{Colors.NC}")
-        client = self.start_client("Client", server.node_id, port=9083)
+        self.log(f"{Colors.YELLOW}Step 1: Connecting client to shared server{Colors.NC}")
+        client = self.start_client("Client", server.node_id, port=self.client_port)
         if not client:
-            self.stop_process(server)
             return self.print_result(False, "Failed to start client")
         
-        time.sleep(2)
+        # A negative check needs the server to have handled this connection,
+        # so wait for its side of the handshake rather than client readiness
+        if not server.reader.wait_for_peer(client.node_id, timeout=5):
+            self.stop_process(client)
+            return self.print_result(False, "Server did not report the client connecting")
         
-        # Verify server has no .tunnel_peer
-        server_has_peer_file = self.check_file_exists(server, ".tunnel_peer")
+        # Verify server has no .tunnel_peer, allowing a short settle window
+        server_has_peer_file = self.wait_for_file(server, ".tunnel_peer", timeout=0.5)
         result = not server_has_peer_file
         
         self.print_result(result, f"Server does NOT have .tunnel_peer file: {result}")
         
         self.stop_process(client)
-        self.stop_process(server)
         return result
     
-    def test_scenario_4_client_peer_persistence(self) -> bool:
+    def test_scenario_4_client_peer_persistence(self, server: Optional[ProcessInfo]) -> bool:
         """Test that client persists server peer ID."""
         self.print_test_header(4, "Client Persists Server Peer ID")
         
-        print(f"{Colors.YELLOW}Step 1: Starting server{Colors.NC}")
-        server = self.start_server("Server", port=8083)
         if not server:
             return self.print_result(False, "Failed to start server")
         
-        time.sleep(1)
-        
-        print(f"{Colors.YELLOW}Step 2: Connecting client to server{Colors.NC}")
-        client = self.start_client("Client", server.node_id, port=9084)
+        self.log(f"{Colors.YELLOW}Step 1: Connecting client to shared server{Colors.NC}")
+        client = self.start_client("Client", server.node_id, port=self.client_port)
         if not client:
-            self.stop_process(server)
             return self.print_result(False, "Failed to start client")
         
-        time.sleep(2)
-        
         # Verify client has .tunnel_peer
-        client_has_peer_file = self.check_file_exists(client, ".tunnel_peer")
+        client_has_peer_file = self.wait_for_file(client, ".tunnel_peer")
         result = client_has_peer_file
         
         self.print_result(result, f"Client has .tunnel_peer file: {result}")
         
         self.stop_process(client)
-        self.stop_process(server)
         return result
     
-    def test_scenario_5_multiple_clients(self) -> bool:
+    def test_scenario_5_multiple_clients(self, server: Optional[ProcessInfo]) -> bool:
         """Test that server accepts multiple different clients."""
         self.print_test_header(5, "Server Accepts Multiple Clients")
         
-        print(f"{Colors.YELLOW}Step 1: Starting server{Colors.NC}")
-        server = self.start_server("Server", port=8084)
         if not server:
             return self.print_result(False, "Failed to start server")
         
-        time.sleep(1)
-        
-        print(f"{Colors.YELLOW}Step 2: Connecting Client 1{Colors.NC}")
-        client1 = self.start_client("Client1", server.node_id, port=9085)
+        self.log(f"{Colors.YELLOW}Step 1: Connecting Client 1 to shared server{Colors.NC}")
+        client1 = self.start_client("Client1", server.node_id, port=self.client_port)
         if not client1:
-            self.stop_process(server)
             return self.print_result(False, "Failed to start Client 1")
         
-        time.sleep(1)
+        self._wait_for(lambda: _port_open('127.0.0.1', client1.port))
         
-        print(f"{Colors.YELLOW}Step 3: Disconnecting Client 1{Colors.NC}")
+        self.log(f"{Colors.YELLOW}Step 2: Disconnecting Client 1{Colors.NC}")
         self.stop_process(client1)
-        time.sleep(1)
+        self._wait_for(lambda: not _port_open('127.0.0.1', client1.port))
         
-        print(f"{Colors.YELLOW}Step 4: Connecting Client 2{Colors.NC}")
-        client2 = self.start_client("Client2", server.node_id, port=9086)
+        self.log(f"{Colors.YELLOW}Step 3: Connecting Client 2{Colors.NC}")
+        client2 = self.start_client("Client2", server.node_id, port=self.client_port + 1)
         if not client2:
-            self.stop_process(server)
             return self.print_result(False, "Failed to start Client 2")
         
         result = True
         self.print_result(result, "Multiple clients can connect sequentially")
         
         self.stop_process(client2)
-        self.stop_process(server)
         return result
     
+    @contextmanager
+    def _shared_server(self, port: int):
+        """Run one server for the duration of the block.
+        
+        Scenarios that only inspect client state (or the server's lack of
+        it) don't need a fresh server each, so they share this one.
+        """
+        server = self.start_server("Shared Server", port=port)
+        if server:
+            self._wait_for(lambda: _port_open('127.0.0.1', server.port))
+        try:
+            yield server
+        finally:
+            if server:
+                self.stop_process(server)
+    
+    def run_scenario(self, scenario, *args) -> bool:
+        """Run a single test scenario on this tester and clean up after it.
+        
+        Output is buffered until the caller collects it with take_output.
+        """
+        self._output = io.StringIO()
+        try:
+            return scenario(self, *args)
+        finally:
+            self.cleanup()
+    
     def run_all_tests(self):
         """Run all test scenarios."""
-        print(f"\n{Colors.BLUE}{Colors.BOLD}╔════════════════════════════════════════════════════════════╗{Colors.NC}")
-        print(f"{Colors.BLUE}{Colors.BOLD}║     Iroh Tunnel Persistence - Integration Test Suite      ║{Colors.NC}")
-        print(f"{Colors.BLUE}{Colors.BOLD}╚════════════════════════════════════════════════════════════╝{Colors.NC}\n")
+        self.log(f"\n{Colors.BLUE}{Colors.BOLD}╔════════════════════════════════════════════════════════════╗{Colors.NC}")
+        self.log(f"{Colors.BLUE}{Colors.BOLD}║     Iroh Tunnel Persistence - Integration Test Suite      ║{Colors.NC}")
+        self.log(f"{Colors.BLUE}{Colors.BOLD}╚════════════════════════════════════════════════════════════╝{Colors.NC}\n")
         
-        if not self.build_binary():
-            print(f"{Colors.RED}Build failed, aborting tests{Colors.NC}")
+        if self._needs_rebuild() and not self.build_binary():
+            self.log(f"{Colors.RED}Build failed, aborting tests{Colors.NC}")
             return
         
-        results = []
-        
+        scenarios = [
+            ("Stable Server ID", TunnelTester.test_scenario_1_stable_server_id, False),
+            ("Ephemeral Client ID", TunnelTester.test_scenario_2_ephemeral_client_id, False),
+            ("Server No Peer Persistence", TunnelTester.test_scenario_3_server_no_peer_persistence, True),
+            ("Client Peer Persistence", TunnelTester.test_scenario_4_client_peer_persistence, True),
+            ("Multiple Clients", TunnelTester.test_scenario_5_multiple_clients, True),
+        ]
+        testers = [
+            TunnelTester(self.binary_path, scenario=index)
+            for index in range(len(scenarios))
+        ]
+        outcomes = {}
+        futures = {}
+        aborted = True
+        
+        # Scenarios are dominated by process startup and sleeps, so running
+        # them on separate threads overlaps the waits
+        executor = ThreadPoolExecutor(max_workers=len(scenarios))
         try:
-            results.append(("Stable Server ID", self.test_scenario_1_stable_server_id()))
-            self.cleanup()
-            time.sleep(1)
-            
-            results.append(("Ephemeral Client ID", self.test_scenario_2_ephemeral_client_id()))
-            self.cleanup()
-            time.sleep(1)
-            
-            results.append(("Server No Peer Persistence", self.test_scenario_3_server_no_peer_persistence()))
-            self.cleanup()
-            time.sleep(1)
+            # Start the scenarios with their own servers first so the shared
+            # server's startup overlaps with them instead of delaying them
+            for tester, (name, scenario, shared) in zip(testers, scenarios):
+                if not shared:
+                    futures[executor.submit(tester.run_scenario, scenario)] = (name, tester)
             
-            results.append(("Client Peer Persistence", self.test_scenario_4_client_peer_persistence()))
-            self.cleanup()
-            time.sleep(1)
-            
-            results.append(("Multiple Clients", self.test_scenario_5_multiple_clients()))
-            self.cleanup()
+            # The shared server gets the port block after the last scenario's
+            with self._shared_server(port=8080 + 10 * len(scenarios)) as server:
+                for tester, (name, scenario, shared) in zip(testers, scenarios):
+                    if shared:
+                        futures[executor.submit(tester.run_scenario, scenario, server)] = (name, tester)
+                
+                for future in as_completed(futures):
+                    name, tester = futures[future]
+                    print(tester.take_output(), end="")
+                    outcomes[name] = future.result()
             
         except KeyboardInterrupt:
-            print(f"\n{Colors.YELLOW}Tests interrupted by user{Colors.NC}")
-            self.cleanup()
-            return
+            self.log(f"\n{Colors.YELLOW}Tests interrupted by user{Colors.NC}")
+            aborted = True
         except Exception as e:
-            print(f"\n{Colors.RED}Test error: {e}{Colors.NC}")
-            self.cleanup()
+            self.log(f"\n{Colors.RED}Test error: {e}{Colors.NC}")
+            aborted = True
+        else:
+            aborted = False
+        finally:
+            # Workers clean up after themselves in run_scenario; from here
+            # only stop their processes so they finish quickly
+            if aborted:
+                for tester in testers:
+                    tester.interrupt()
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        if aborted:
+            # Every worker has finished, so its buffered output is complete
+            for tester in testers:
+                print(tester.take_output(), end="")
             return
         
+        results = [(name, outcomes[name]) for name, _, _ in scenarios]
+        
         # Print summary
-        print(f"\n{Colors.BLUE}{Colors.BOLD}{'=' * 60}{Colors.NC}")
-        print(f"{Colors.BLUE}{Colors.BOLD}TEST SUMMARY{Colors.NC}")
-        print(f"{Colors.BLUE}{Colors.BOLD}{'=' * 60}{Colors.NC}\n")
+        self.log(f"\n{Colors.BLUE}{Colors.BOLD}{'=' * 60}{Colors.NC}")
+        self.log(f"{Colors.BLUE}{Colors.BOLD}TEST SUMMARY{Colors.NC}")
+        self.log(f"{Colors.BLUE}{Colors.BOLD}{'=' * 60}{Colors.NC}\n")
         
         passed = sum(1 for _, result in results if result)
         total = len(results)
         
         for name, result in results:
             status = f"{Colors.GREEN}PASS{Colors.NC}" if result else f"{Colors.RED}FAIL{Colors.NC}"
-            print(f"  {status}  {name}")
+            self.log(f"  {status}  {name}")
         
-        print()
+        self.log()
         if passed == total:
-            print(f"{Colors.GREEN}{Colors.BOLD}✓ All {total} tests passed!{Colors.NC}")
+            self.log(f"{Colors.GREEN}{Colors.BOLD}✓ All {total} tests passed!{Colors.NC}")
         else:
-            print(f"{Colors.YELLOW}{passed}/{total} tests passed{Colors.NC}")
-        print()
+            self.log(f"{Colors.YELLOW}{passed}/{total} tests passed{Colors.NC}")
+        self.log()
 
 
 def main():